@@ -3,10 +3,12 @@ Implementation is currently read-only. No directories are allowed in pathes; you
 **Documentation for API methods implemented here only describes differences from default implementation. See https://docs.pyfilesystem.org for full docs.**
 
 """
-from __future__ import unicode_literals
-
 import io
 import logging
+import requests
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from oc_cdtapi import NexusAPI
 from uuid import uuid4
 from functools import wraps
@@ -14,11 +16,19 @@ from fs.base import FS
 from fs.errors import Unsupported, ResourceNotFound, FileExpected, DirectoryExpected
 from fs.info import Info
 from fs.wrap import WrapReadOnly
-from sys import version_info
+from requests.adapters import HTTPAdapter
 
 
 logger=logging.getLogger(__name__)
 
+# artifacts smaller than this are kept in RAM, larger ones are spilled to disk
+_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+# number of simultaneous downloads in NexusReadonlyFS.prefetch()
+_DEFAULT_PREFETCH_WORKERS = 8
+# connection pool of NexusAPI session, should not be less than number of prefetch workers
+_POOL_CONNECTIONS = 16
+_POOL_MAXSIZE = 64
+
 
 def _wrap_nexusapi_error(fun):
     """ Maps HTTP-based NexusAPI errors to fs exceptions. All methods calling NexusAPI should be wrapped in this. """
@@ -42,22 +52,60 @@ def _wrap_nexusapi_error(fun):
     return wrapped
 
 
+def _setup_session(nexus_client):
+    """ Enlarges connection pool of NexusAPI requests session so that parallel downloads reuse connections.
+    Only default HTTPAdapter instances are replaced, keeping their retry settings; custom adapters and clients without requests session are left as is """
+    session=getattr(nexus_client, "web", None)
+    if not isinstance(session, requests.Session):
+        return
+    for prefix in ["http://", "https://"]:
+        current_adapter=session.get_adapter(prefix)
+        if type(current_adapter) is not HTTPAdapter:
+            continue
+        if current_adapter.poolmanager.connection_pool_kw.get("maxsize", 0) >= _POOL_MAXSIZE:
+            continue
+        session.mount(prefix, HTTPAdapter(pool_connections=_POOL_CONNECTIONS, pool_maxsize=_POOL_MAXSIZE,
+                                          max_retries=current_adapter.max_retries))
+
+
+def _close_downloaded(future):
+    """ Closes handle of download which result won't be consumed """
+    if not future.cancelled() and future.exception() is None:
+        future.result()[0].close()
+
+
 class NexusFS(WrapReadOnly):
     """ FS standard read-only wrapper which prohibits write actions. Creates actual Nexus FS implementation instance internally.
 
     """
     
-    def __init__(self, client, work_fs=None, *args, **kwargs):
-        super(NexusFS, self).__init__(NexusReadonlyFS(client, work_fs), *args, **kwargs)
+    def __init__(self, client, work_fs=None, max_cache_bytes=0, *args, **kwargs):
+        super(NexusFS, self).__init__(NexusReadonlyFS(client, work_fs, max_cache_bytes), *args, **kwargs)
+
+    def prefetch(self, gavs, max_workers=_DEFAULT_PREFETCH_WORKERS):
+        """ See NexusReadonlyFS.prefetch """
+        self.delegate_fs().prefetch(gavs, max_workers)
+
+    def openbin_many(self, gavs, max_workers=_DEFAULT_PREFETCH_WORKERS):
+        """ See NexusReadonlyFS.openbin_many """
+        return self.delegate_fs().openbin_many(gavs, max_workers)
 
 
 class NexusReadonlyFS(FS):
-    def __init__(self, nexus_client, work_fs=None, *args, **kwargs):
+    def __init__(self, nexus_client, work_fs=None, max_cache_bytes=0, *args, **kwargs):
         """
         :param nexus_client: NexusAPI client 
-        :param work_fs: optional FS instance where loaded artifacts will be cached (reduces RAM consumption). Should be cleaned by user """
+        :param work_fs: optional FS instance where loaded artifacts will be cached (reduces RAM consumption). Should be cleaned by user
+        :param max_cache_bytes: total size of artifacts remembered between openbin() calls, caching is disabled by default.
+            Cached content is not checked for updates, so don't enable it for changing artifacts like SNAPSHOTs.
+            Without work_fs only artifacts not larger than in-memory spool size are cached """
         self._nexus = nexus_client
+        _setup_session(nexus_client)
         self._work_fs=work_fs
+        self._max_cache_bytes=max_cache_bytes
+        # gav -> (content bytes or work_fs filename, size), least recently used first
+        self._cache=OrderedDict()
+        self._cache_bytes=0
         super(NexusReadonlyFS, self).__init__(*args, **kwargs)
 
     def getinfo(self, path, namespaces=None):
@@ -68,26 +116,138 @@ class NexusReadonlyFS(FS):
     def openbin(self, gav, mode="r", buffering=-1, **options):
         """ Retrieves artifact content. Only binary read is supported now. Other params are ignored.
         If work_fs was specified in constructor, then artifact is loaded into it, and then handle to work_fs file is returned.
+        Otherwise artifact is streamed into spooled temporary file which is moved from RAM to disk when it grows large.
+        If caching is enabled, artifacts fitting into max_cache_bytes are remembered, so repeated opening of same gav doesn't download it again.
         
         :param gav: gav of artifact (acts like regular filename)
         :returns: file-like object pointing to artifact content
         """
         if mode not in ["r", "rb"]:
             raise Unsupported("Only basic read mode supported at this moment")
+        cached_handle=self._open_cached(gav)
+        if cached_handle is not None:
+            return cached_handle
+        return self._remember(gav, *self._download(gav))
+
+    def prefetch(self, gavs, max_workers=_DEFAULT_PREFETCH_WORKERS):
+        """ Downloads artifacts concurrently and puts them into cache, so following openbin() calls don't wait for network.
+        Does nothing if caching is disabled. Artifacts which can't be cached are downloaded too but not kept.
+
+        :param gavs: iterable of gavs
+        :param max_workers: max number of simultaneous downloads
+        """
+        if not self._max_cache_bytes:
+            logger.warning("NexusFS.prefetch does nothing since caching is disabled."
+                           " Pass max_cache_bytes to enable it")
+            return
+        for _, handle in self.openbin_many(gavs, max_workers):
+            handle.close()
+
+    def openbin_many(self, gavs, max_workers=_DEFAULT_PREFETCH_WORKERS):
+        """ Opens several artifacts for binary read, downloading missing ones in thread pool.
+        All threads share NexusAPI client, so its requests session (and connection pool) is reused.
+        Consumer may start reading first artifacts while others are still being downloaded.
+
+        Closing generator before it is exhausted cancels pending downloads; same happens if any download fails.
+
+        :param gavs: iterable of gavs, duplicates are opened once
+        :param max_workers: max number of simultaneous downloads
+        :returns: generator of (gav, handle) pairs. Cached artifacts go first, then others in order of download completion
+        """
+        cached_handles=[]
+        missing_gavs=[]
+        for gav in OrderedDict.fromkeys(gavs):
+            cached_handle=self._open_cached(gav)
+            if cached_handle is not None:
+                cached_handles.append((gav, cached_handle))
+            else:
+                missing_gavs.append(gav)
+        # cache is only accessed from this generator, worker threads just download
+        executor=ThreadPoolExecutor(max_workers=max_workers)
+        futures={executor.submit(self._download, gav): gav for gav in missing_gavs}
+        try:
+            while cached_handles:
+                yield cached_handles.pop(0)
+            for future in as_completed(futures):
+                gav=futures.pop(future)
+                yield gav, self._remember(gav, *future.result())
+        finally:
+            # generator closed early or download failed: don't wait for the rest and don't leak handles
+            for gav, handle in cached_handles:
+                handle.close()
+            for future in futures:
+                if not future.cancel():
+                    future.add_done_callback(_close_downloaded)
+            executor.shutdown(wait=False)
+
+    @_wrap_nexusapi_error
+    def _download(self, gav):
+        """ Streams artifact into new handle. Doesn't touch cache so it is safe to call from worker threads
+
+        :returns: tuple of handle rewound to beginning, artifact size and preload filename (None if work_fs is not used)
+        """
         if self._work_fs:
-            if version_info.major == 2:
-                preload_filename=unicode(uuid4())
+            preload_filename=str(uuid4())
+            with self._work_fs.openbin(preload_filename, "w") as preload_handle:
+                self._nexus.cat(gav, stream=True, write_to=preload_handle)
+                size=preload_handle.tell()
+            # caller gets separate read-only handle, so preloaded content can't be modified through it
+            return self._work_fs.openbin(preload_filename), size, preload_filename
+        handle=tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_SIZE)
+        try:
+            self._nexus.cat(gav, stream=True, write_to=handle)
+        except Exception:
+            handle.close()
+            raise
+        size=handle.tell()
+        handle.seek(0)
+        return handle, size, None
+
+    def _remember(self, gav, handle, size, preload_filename):
+        """ Puts downloaded artifact into cache if it fits
+
+        :returns: handle to read artifact from
+        """
+        # empty artifacts fit even into zero limit, so disabled cache is checked explicitly
+        if not self._max_cache_bytes or size > self._max_cache_bytes:
+            return handle
+        if preload_filename:
+            self._cache_put(gav, preload_filename, size)
+            return handle
+        # larger artifacts are spilled to disk, reading them back into RAM would break the spool limit
+        if size > _SPOOL_MAX_SIZE:
+            return handle
+        content=handle.read()
+        handle.close()
+        self._cache_put(gav, content, size)
+        return io.BytesIO(content)
 
-            if version_info.major == 3:
-                preload_filename=str(uuid4())
+    def _open_cached(self, gav):
+        """ Returns new handle to previously loaded artifact or None if it is not cached """
+        cached=self._cache.get(gav)
+        if cached is None:
+            return None
+        value=cached[0]
+        if not self._work_fs:
+            self._cache.move_to_end(gav)
+            return io.BytesIO(value)
+        if self._work_fs.exists(value):
+            self._cache.move_to_end(gav)
+            return self._work_fs.openbin(value)
+        # preloaded file was removed by user
+        self._cache_bytes -= cached[1]
+        del self._cache[gav]
+        return None
 
-            with self._work_fs.openbin(preload_filename, "w") as preload_file:
-                self._nexus.cat(gav, stream=True, write_to=preload_file)
-            handle=self._work_fs.openbin(preload_filename)
-        else:
-            file_content = self._nexus.cat(gav, binary=True)
-            handle = io.BytesIO(file_content)
-        return handle
+    def _cache_put(self, gav, value, size):
+        """ Remembers loaded artifact and evicts least recently used ones to fit into max_cache_bytes """
+        if gav in self._cache:
+            self._cache_bytes -= self._cache.pop(gav)[1]
+        self._cache[gav]=(value, size)
+        self._cache_bytes += size
+        while self._cache_bytes > self._max_cache_bytes:
+            _, (_, evicted_size)=self._cache.popitem(last=False)
+            self._cache_bytes -= evicted_size
 
     @_wrap_nexusapi_error
     def listdir(self, path):
@@ -98,7 +258,7 @@ class NexusReadonlyFS(FS):
         """
         logger.warning("NexusFS.listdir relies on unstable NexusAPI.ls."
                         " Be careful using it")
-        if path != u"/":
+        if path != "/":
             raise Unsupported("Only root listing makes sense for Nexus repository")
         all_artifacts_wildcard = "com*::"
         return self._nexus.ls(all_artifacts_wildcard)
@@ -4,20 +4,18 @@ Implementation is read-only, mainly because there is no obvious correspondence b
 
 """
 
-from __future__ import unicode_literals
-
 import io
 import os
-import urllib
-
-from sys import version_info
-
-if version_info.major == 2:
-    import urlparse
+import re
+import tempfile
+import urllib.parse
 
 import pysvn
+from collections import defaultdict
+from fnmatch import translate
+from contextlib import contextmanager
 from functools import wraps
-from oc_pyfs.fs_utils import dir_info, file_info
+from oc_pyfs.fs_utils import basic_path_info, dir_info, file_info
 from fs.base import FS
 from fs.errors import Unsupported, ResourceNotFound, FileExpected, DirectoryExpected
 from fs.info import Info
@@ -30,26 +28,44 @@ import traceback
 
 logger=logging.getLogger(__name__)
 
+# files larger than this are kept on disk after opening
+_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+def _map_pysvn_error(err):
+    """ Raises pyfs exception corresponding to SVN error codes of given pysvn error. Must be called from except block """
+    error_codes = [entry[1] for entry in err.args[1]]
+    msg = str(err.args[0])
+    if (pysvn.svn_err.fs_not_found in error_codes
+        or pysvn.svn_err.ra_illegal_url in error_codes):
+        raise ResourceNotFound(msg)
+    elif pysvn.svn_err.client_is_directory in error_codes:
+        raise FileExpected(msg)
+    else:
+        # exception stacktrace only includes fragment inside try block
+        # full trace should be accessed manually
+        full_stack_info = "\n".join(traceback.format_stack())
+        logger.exception("Unhandled pysvn exception thrown. Full stacktrace: %s" % full_stack_info)
+        raise Unsupported(msg)
+
+
+@contextmanager
+def _svn_errors():
+    """ Maps SVN error codes to pyfs exceptions raised inside with block. Use it around pysvn calls in internal methods """
+    try:
+        yield
+    except pysvn.ClientError as err:
+        _map_pysvn_error(err)
+
+
 def _wrap_pysvn_error(func):
-    """ Maps SVN error codes to pyfs exceptions. Should be applied to all public SvnFS methods  """
+    """ Maps SVN error codes to pyfs exceptions. Should be applied to public SvnFS entry points, see _svn_errors for internal methods.
+    Plain try/except is used here since context manager costs noticeably more per call """
     @wraps(func)
     def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
         except pysvn.ClientError as err:
-            error_codes = [entry[1] for entry in err.args[1]]
-            msg = str(err.args[0])
-            if (pysvn.svn_err.fs_not_found in error_codes
-                or pysvn.svn_err.ra_illegal_url in error_codes):
-                raise ResourceNotFound(msg)
-            elif pysvn.svn_err.client_is_directory in error_codes:
-                raise FileExpected(msg)
-            else:
-                # exception stacktrace only includes fragment inside try block
-                # full trace should be accessed manually
-                full_stack_info = "\n".join(traceback.format_stack())
-                logger.exception("Unhandled pysvn exception thrown. Full stacktrace: %s" % full_stack_info)
-                raise Unsupported(msg)
+            _map_pysvn_error(err)
     return wrapper
 
 
@@ -62,10 +78,13 @@ class SvnWalker(Walker):
 
     def __init__(self, ignore_errors=False, on_error=None,
                  search="depth", filter=None, exclude_dirs=None):
-        if filter or exclude_dirs:
-            raise NotSupported(msg="No support for filtered walking yet")
-        super(SvnWalker, self).__init__(ignore_errors, on_error, search,
-                                        filter, exclude_dirs)
+        """ :param filter: list of glob patterns, only files with matching names are listed. Directories are not filtered
+        :param exclude_dirs: list of glob patterns, directories with matching names are skipped with all their content """
+        super(SvnWalker, self).__init__(ignore_errors=ignore_errors, on_error=on_error,
+                                        search=search, filter=filter, exclude_dirs=exclude_dirs)
+        # patterns are compiled once, so each listing entry is matched by single regex call
+        self._match_file=_compile_patterns(filter)
+        self._match_excluded_dir=_compile_patterns(exclude_dirs)
 
     @classmethod
     def bind(cls, fs):
@@ -74,7 +93,6 @@ class SvnWalker(Walker):
         """
         return BoundWalker(fs, walker_class=SvnWalker)
 
-    @_wrap_pysvn_error
     def walk(self, fs, path, namespaces=None):
         """ Only root walking is allowed for simplicity. Use fs.opendir(path).walk() instead of fs.walk(path) """
         if path != '/':
@@ -88,64 +106,83 @@ class SvnWalker(Walker):
         return walk_steps
 
     def _get_walk_steps(self, svn_pathes_info):
-        """ Groups svn listing entries by directory and packs it in Info objects """
+        """ Groups svn listing entries by directory and packs it in Info objects.
+        svn returns recursive listing depth-first, so each directory comes before its content and no sorting is needed.
+        Steps are yielded parent first, so grouping has to be finished before first step (root) is complete """
         keys_order = [ '/' ]
-        dir_structure = { '/': []}
-        files_structure = {'/': []}
-        # ensure that entries are sorted
-        for entry in sorted(svn_pathes_info, key=lambda arg: arg[0]):
-            entry_path = entry[0]
-            entry_dir = os.path.dirname(entry_path)
-            entry_name = os.path.basename(entry_path)
-            if entry[1]:  # is dir
+        dir_structure = defaultdict(list, {'/': []})
+        files_structure = defaultdict(list, {'/': []})
+        for entry_path, is_dir in svn_pathes_info:
+            entry_dir, _, entry_name = entry_path.rpartition('/')
+            entry_dir = entry_dir or '/'
+            # Info is built once per entry right when it is parsed
+            if is_dir:
                 keys_order.append(entry_path)
-                dir_structure[entry_path] = []
-                files_structure[entry_path] = []
-                dir_structure[entry_dir].append(entry_name)
+                dir_structure[entry_dir].append(dir_info(entry_name))
             else:
-                files_structure[entry_dir].append(entry_name)
+                files_structure[entry_dir].append(file_info(entry_name))
 
-        make_step = lambda key: (key, [dir_info(path) for path in dir_structure[key]],
-                                 [file_info(path) for path in files_structure[key]])
-        steps = [make_step(key) for key in keys_order]
-        return steps
+        for key in keys_order:
+            # grouped entries are released as soon as their step is handed out
+            yield (key, dir_structure.pop(key, []), files_structure.pop(key, []))
 
     def _get_listing_info(self, path, svn_client):
-        """ Parses pysvn listing to intermediate (path, is_dir) tuples """
-        raw_ls = svn_client.list(_get_pysvn_url(path), recurse=True,
-                                 dirent_fields=pysvn.SVN_DIRENT_KIND)
-        root_path = raw_ls[0][0]["repos_path"]
+        """ Parses pysvn listing to intermediate (path, is_dir) tuples.
+        Listing is retrieved immediately, entries are parsed lazily """
+        # pysvn list() doesn't accept svn 1.10 search patterns, so filters are applied here
+        with _svn_errors():
+            raw_ls = svn_client.list(_get_pysvn_url(path), recurse=True,
+                                     dirent_fields=pysvn.SVN_DIRENT_KIND)
+        root_path_len = len(raw_ls[0][0]["repos_path"])
         actual_listing=raw_ls[1:]
-        entry_path = lambda entry: entry[0]["repos_path"].replace(root_path, "", 1) or '/'
+        # all entries start with root path, so it is cut by length
+        entry_path = lambda entry: entry[0]["repos_path"][root_path_len:] or '/'
         is_entry_dir = lambda entry: entry[0]["kind"] == pysvn.node_kind.dir
         make_path_info = lambda entry: (entry_path(entry), is_entry_dir(entry))
-        svn_pathes_info = [make_path_info(svn_path) for svn_path in actual_listing]
+        svn_pathes_info = (make_path_info(svn_path) for svn_path in actual_listing)
+        if self._match_excluded_dir:
+            svn_pathes_info = self._skip_excluded_dirs(svn_pathes_info)
+        if self._match_file:
+            match_file = self._match_file
+            svn_pathes_info = (path_info for path_info in svn_pathes_info
+                               if path_info[1] or match_file(path_info[0].rpartition('/')[2]))
         return svn_pathes_info
 
-    @_wrap_pysvn_error
+    def _skip_excluded_dirs(self, svn_pathes_info):
+        """ Drops excluded directories with their content. Listing is depth-first, so content goes right after directory """
+        excluded_prefix = None
+        for entry_path, is_dir in svn_pathes_info:
+            if excluded_prefix and entry_path.startswith(excluded_prefix):
+                continue
+            excluded_prefix = None
+            if is_dir and self._match_excluded_dir(entry_path.rpartition('/')[2]):
+                excluded_prefix = entry_path + '/'
+                continue
+            yield entry_path, is_dir
+
     def info(self, fs, path='/', namespaces=None):
         """ Overrides default implementation because it calls more general walk() first. It brings unnecessary complexity when plain Info listing is needed """
-        url = fs.getsyspath(path)
-        svn_client = fs.getinfo('/', ["svn"]).get("svn", "client")
-        listing_data=self._get_listing_info(url, svn_client)
-        make_info = lambda entry: (dir_info(entry[0]) if entry[1] else file_info(entry[0]))
-        listing_info=((data[0], make_info(data)) for data in listing_data)
+        listing_data=self._get_fs_listing_info(fs, path)
+        # full pathes are unique, so cached dir_info/file_info would only be polluted by them
+        listing_info=((data[0], basic_path_info(data[0], data[1])) for data in listing_data)
         return listing_info
 
-    @_wrap_pysvn_error
     def files(self, fs, path='/'):
-        listing_info=self.info(fs, path)
-        files=(entry[0] for entry in listing_info
-               if not entry[1].is_dir)
+        listing_data=self._get_fs_listing_info(fs, path)
+        files=(entry[0] for entry in listing_data if not entry[1])
         return files
-        
-    @_wrap_pysvn_error
+
     def dirs(self, fs, path='/'):
-        listing_info=self.info(fs, path)
-        dirs=(entry[0] for entry in listing_info
-              if entry[1].is_dir)
+        listing_data=self._get_fs_listing_info(fs, path)
+        dirs=(entry[0] for entry in listing_data if entry[1])
         return dirs
 
+    def _get_fs_listing_info(self, fs, path):
+        """ Same as _get_listing_info but takes URL and svn client from given fs """
+        url = fs.getsyspath(path)
+        svn_client = fs.getinfo('/', ["svn"]).get("svn", "client")
+        return self._get_listing_info(url, svn_client)
+
 
 class SvnFS(WrapReadOnly):
     """ FS standard read-only wrapper which prohibits write actions. Creates actual svn FS implementation instance internally.
@@ -159,7 +196,7 @@ class SvnFS(WrapReadOnly):
 
 class SvnReadonlyFS(FS):
     """ Actual SVN implementation of pyfilesystem interface.
-    URLs in all pysvn calls must be wrapped with _get_pysvn_url().
+    URLs in all pysvn calls must be wrapped with _get_pysvn_url() or built by _get_pysvn_path_url().
     Only read-only actions are allowed.
     Methods for write actions are mocked because its existence is checked by abc.
 
@@ -183,16 +220,16 @@ class SvnReadonlyFS(FS):
         # URL of SVN repo
         self.repo_root = info.repos_root_URL.rstrip('/')
 
-        if version_info.major == 2:
-            self.repo_root = _force_unicode( self.repo_root )
-
-        base_ls_result=self.svn.list(_get_pysvn_url(branch_url), recurse=False)[0][0]
-
         # path to base path relative to repo_root
-        self.branch_relative=base_ls_result.repos_path.strip('/')
+        # both URLs are escaped in the same way by svn, so branch URL starts with root URL
+        self.branch_relative=_unquote(branch_url[len(info.repos_root_URL):]).strip('/')
+
+        # already escaped root to append escaped pathes to
+        self._pysvn_repo_root=_get_pysvn_url(self.repo_root)
 
-        if version_info.major == 2:
-            self.branch_relative=_force_unicode(self.branch_relative)
+        # used to cut branch from each listing entry
+        self._branch_prefix=self.branch_relative.strip('/')
+        self._branch_prefix_len=len(self._branch_prefix)
 
     def getsyspath(self, rel_path):
         """ Overrides standard getsyspath(). 
@@ -200,29 +237,26 @@ class SvnReadonlyFS(FS):
         :param rel_path: path relative to branch url set up in __init__ 
         :returns: full URL to given path 
         """
-        repo_path=_join_url(self.branch_relative, rel_path.strip('/'))
+        repo_path=_join2(self.branch_relative, rel_path)
         url=self.get_root_path_url(repo_path)
         return url
 
+    def _get_pysvn_path_url(self, rel_path):
+        """ Same as _get_pysvn_url(self.getsyspath(rel_path)) but escapes only path part since root is known already
+
+        :param rel_path: path relative to branch url set up in __init__
+        :returns: full escaped URL to given path
+        """
+        repo_path=_join2(self.branch_relative, rel_path)
+        return self._pysvn_repo_root + '/' + _quote(repo_path.strip('/'))
+
     def get_root_path_url(self, repo_path):
         """ Appends given path to base repo url
 
         :param repo_path: Path relative to repository root 
         :returns: absolute URL of svn item
         """
-
-        # some strings are passed as bytes in python 2
-        if version_info.major == 2:
-            repo_path=_force_unicode(repo_path)
-
-        # urllib.quote doesn't process unicode strings
-        # prepared_path=urllib.quote(repo_path.encode("utf8"))
-        prepared_path=repo_path
-        joined=_join_url(self.repo_root, prepared_path.strip('/'))
-
-        # though non-ascii symbols are not allowed in URL, we can still present ascii symbols as unicode
-        if version_info.major == 2 :
-            joined=_force_unicode(joined) 
+        joined=_join2(self.repo_root, repo_path)
         return joined
 
     @_wrap_pysvn_error
@@ -236,16 +270,16 @@ class SvnReadonlyFS(FS):
         * 'log*' custom namespace with 'change_history' key. Pass 'log' for full history and 'log_N' to for N latest entries
         
         """
-        if version_info.major == 2:
-            rel_path=_force_unicode(rel_path);
         if not namespaces:
             namespaces = ["basic"]
         if any(ns not in ["basic", "svn", "log"] and not ns.startswith("log_") for ns in namespaces):
             raise Unsupported(msg="Namespaces: " + ", ".join(namespaces) +
                               "; only basic, svn and log namespaces supported")
-        full_info = {"basic": self._get_basic_info(rel_path)}
+        # one info2 call serves both basic and svn namespaces
+        pysvn_info = self.svn.info2(self._get_pysvn_path_url(rel_path), recurse=False)[0][1]
+        full_info = {"basic": self._get_basic_info(rel_path, pysvn_info)}
         if "svn" in namespaces:
-            full_info["svn"] = self._get_svn_info(rel_path)
+            full_info["svn"] = self._get_svn_info(pysvn_info)
         log_namespaces=list(filter(lambda ns: ns.startswith("log"), namespaces))
         if log_namespaces:
             log_ns=log_namespaces[0] # use only first entry
@@ -256,19 +290,15 @@ class SvnReadonlyFS(FS):
             full_info[log_ns]= self._get_log_namespace(rel_path, limit)        
         return Info(full_info)
 
-    def _get_basic_info(self, rel_path):
+    def _get_basic_info(self, rel_path, pysvn_info):
         rel_path = rel_path.lstrip('/')
-        url = self.getsyspath(rel_path)
-        pysvn_info = self.svn.info2(_get_pysvn_url(url), recurse=False)
         basic_info = {"name": os.path.basename(rel_path),
-                      "is_dir": pysvn_info[0][1]["kind"] == pysvn.node_kind.dir
+                      "is_dir": pysvn_info["kind"] == pysvn.node_kind.dir
                       }
         return basic_info
 
-    def _get_svn_info(self, rel_path):
-        url = self.getsyspath(rel_path)
-        pysvn_info = self.svn.info2(_get_pysvn_url(url), recurse=False)
-        revision=pysvn_info[0][1]["rev"].number
+    def _get_svn_info(self, pysvn_info):
+        revision=pysvn_info["rev"].number
         svn_info={"client": self.svn,
                   "revision": revision}
         return svn_info
@@ -281,88 +311,76 @@ class SvnReadonlyFS(FS):
         :returns: filtered list of pysvn log entries. Pathes are cut to branch root. See pysvn docs for full description
         """
         url=self.getsyspath(rel_path)
-        raw_log=self.svn.log(_get_pysvn_url(url), discover_changed_paths=True,
+        raw_log=self.svn.log(self._get_pysvn_path_url(rel_path), discover_changed_paths=True,
                              limit=limit if limit else 0)
-        log_without_unrelated=[self._exclude_unrelated_changes(entry, rel_path)
-                               for entry in raw_log]
-        filtered_log=list( filter(lambda entry: len(entry["changed_paths"])>0,
-                            log_without_unrelated) ) 
-        stripped_log=[self._strip_entry_path(entry, rel_path) for entry in filtered_log]
+        rel_path=rel_path.strip('/')
+        stripped_log=[]
+        for entry in raw_log:
+            stripped_entry=self._filter_entry_changes(entry, url, rel_path)
+            if stripped_entry["changed_paths"]:
+                stripped_log.append(stripped_entry)
         log_ns={"change_history": stripped_log}
         return log_ns
 
-    def _exclude_unrelated_changes(self, entry, rel_path):
-        """ Removes changed pathes which belong to same revision but not belong to requested path """
-        rel_path=rel_path.strip('/')
-        filtered_entry=dict(entry)
-        change_url=lambda change: self.get_root_path_url(change["path"])
-        requested_url=self.getsyspath(rel_path)
-        is_related=lambda change: change_url(change)==requested_url or change_url(change).startswith(requested_url)
-        filtered_entry["changed_paths"]=list( filter(is_related, entry["changed_paths"]) )
-        return filtered_entry
-        
-    def _strip_entry_path(self, entry, rel_path):
-        """ Strips pathes in log entry to requested path """
-        rel_path=rel_path.strip('/')
+    def _filter_entry_changes(self, entry, requested_url, rel_path):
+        """ Removes changed pathes which belong to same revision but not belong to requested path.
+        Strips remaining pathes to requested path
+
+        :param entry: pysvn log entry
+        :param requested_url: full URL of requested path
+        :param rel_path: requested path relative to base path without leading and trailing slashes
+        :returns: copy of log entry with filtered changed pathes
+        """
         stripped_entry=dict(entry)
-        strip_change_path=lambda change: self._extract_requested_path(change["path"], rel_path)
-        replace_entry_path=lambda change: dict(change, path=strip_change_path(change))
-        stripped_entry["changed_paths"]=map(replace_entry_path, entry["changed_paths"])
+        # list, not filter(): changed paths may be iterated several times by caller
+        stripped_entry["changed_paths"]=[dict(change, path=self._extract_requested_path(change["path"], rel_path))
+                                         for change in entry["changed_paths"]
+                                         if self.get_root_path_url(change["path"]).startswith(requested_url)]
         return stripped_entry
 
     @_wrap_pysvn_error
-    def openbin(self, rel_path, mode=u'r', buffering=-1, **options):
-        """ Implemented by pysvn.cat(). File content is downloaded i.e. streaming is not supported. Only bytes read is supported """
+    def openbin(self, rel_path, mode='r', buffering=-1, **options):
+        """ Implemented by pysvn.cat(). File content is downloaded i.e. streaming is not supported. Only bytes read is supported.
+        Large files are moved to temporary file on disk so opened handle doesn't hold them in RAM """
         if mode not in ["r", "rb"]:
             raise Unsupported(msg="Only basic read mode supported at this moment")
-        path = self.getsyspath(rel_path)
-        file_content = self.svn.cat(_get_pysvn_url(path)) # keep it str (i.e. raw bytes)
-        wrapper = io.BytesIO(file_content)
+        file_content = self.svn.cat(self._get_pysvn_path_url(rel_path)) # keep it str (i.e. raw bytes)
+        if len(file_content) <= _SPOOL_MAX_SIZE:
+            # BytesIO shares buffer with bytes object, no copy is made
+            return io.BytesIO(file_content)
+        wrapper = tempfile.TemporaryFile()
+        wrapper.write(file_content)
+        wrapper.seek(0)
         return wrapper
 
     @_wrap_pysvn_error
     def listdir(self, rel_path):
         raw_ls = self._raw_svn_ls(rel_path)
-
-        ls_from_root = [ ent[0].repos_path for ent in raw_ls ]
-
-        if version_info.major == 2:
-            ls_from_root = [ _force_unicode( ent ) for ent in ls_from_root ]
-
-        requested_listing=[self._extract_requested_path(ls_entry, rel_path)
-                           for ls_entry in ls_from_root]
+        requested_listing=(self._extract_requested_path(ent[0].repos_path, rel_path)
+                           for ent in raw_ls)
         ls_result = list( filter(None, requested_listing) )
         return ls_result
 
-    @_wrap_pysvn_error
     def scandir(self, path, namespaces=None, page=None):
         """ Only path argument is supported now """
         if namespaces or page:
             raise Unsupported("SvnFS.scandir() currently supports only path argument")
-        raw_ls = self._raw_svn_ls(path)
-        ls_from_root = [ent[0].repos_path for ent in raw_ls]
-        node_kinds = [ent[0].kind for ent in raw_ls]
-        
-        requested_listing=[self._extract_requested_path(ls_entry, path)
-                           for ls_entry in ls_from_root]
-
-        rejoined = zip(requested_listing, node_kinds)
-        ls = filter(lambda arg: arg[0], rejoined)
-
-        make_info = lambda entry: (dir_info(entry[0])
-                                   if entry[1] == pysvn.node_kind.dir
-                                   else file_info(entry[0]))
-        infos = (make_info(entry) for entry in ls)
+        # listing is retrieved right away so that pysvn errors are mapped, entries are processed lazily
+        with _svn_errors():
+            raw_ls = self._raw_svn_ls(path)
+        requested_listing = ((self._extract_requested_path(ent[0].repos_path, path), ent[0].kind)
+                             for ent in raw_ls)
+        infos = ((dir_info(name) if kind == pysvn.node_kind.dir else file_info(name))
+                 for name, kind in requested_listing if name)
         return infos
 
     def _raw_svn_ls(self, rel_path):
         """ Utility wrapper on pysvn.list. Checks that requested path is dir """
-        path = self.getsyspath(rel_path)
-        raw_ls = self.svn.list(_get_pysvn_url(path), recurse=False,
+        raw_ls = self.svn.list(self._get_pysvn_path_url(rel_path), recurse=False,
                                dirent_fields=pysvn.SVN_DIRENT_KIND)
         # first entry is requested dir itself
         if len(raw_ls) == 1 and raw_ls[0][0].kind == pysvn.node_kind.file:
-            raise DirectoryExpected("%s is regular file" % path)
+            raise DirectoryExpected("%s is regular file" % self.getsyspath(rel_path))
         return raw_ls[1:]
 
     def _extract_requested_path(self, path_from_root, branch_relative_base):
@@ -377,13 +395,11 @@ class SvnReadonlyFS(FS):
 
     def _strip_to_base(self, path_from_root):
         """ Removes branch from path from repo root """
-        if version_info.major == 2:
-            path_from_root = _force_unicode(path_from_root)
-        cut_path=path_from_root.replace(self.branch_relative.strip('/'), "").lstrip('/')
-
-        if version_info.major == 2:
-            cut_path=_force_unicode(cut_path)
-
+        path_from_root=path_from_root.lstrip('/')
+        if path_from_root.startswith(self._branch_prefix):
+            cut_path=path_from_root[self._branch_prefix_len:].lstrip('/')
+        else:
+            cut_path=path_from_root.replace(self._branch_prefix, "").lstrip('/')
         return cut_path
         
     def _strip_dir_prefix(self, path, prefix):
@@ -393,7 +409,7 @@ class SvnReadonlyFS(FS):
         # only strip beginning, not any occurence
         if path.startswith(dir_name):
             # also remove leading slash left after dir removal
-            return path.replace(dir_name, "", 1).lstrip('/') 
+            return path[len(dir_name):].lstrip('/')
         else:
             return path
 
@@ -417,34 +433,31 @@ class SvnReadonlyFS(FS):
         raise Unsupported(msg="Read-only FS")
 
 
-if version_info.major == 2:
-    def _force_unicode(str_data):
-        """ pysvn returns strings in str, but pyfs works with unicode only """
-        return str_data if isinstance(str_data, unicode) else str_data.decode("utf8")
+_quote = urllib.parse.quote
+_unquote = urllib.parse.unquote
+
+def _compile_patterns(patterns):
+    """ Compiles glob patterns into one case-sensitive regex
+
+    :param patterns: list of glob patterns or None
+    :returns: match function of compiled regex, None if no patterns given
+    """
+    if not patterns:
+        return None
+    return re.compile('|'.join(translate(pattern) for pattern in patterns)).match
 
 def _join_url(*parts):
     """ due to strange behaviour of urllib.join it's better to join manually """
     return '/'.join( part.strip('/') for part in parts )
 
+def _join2(first, second):
+    """ Same as _join_url(first, second), used in per-entry URL building """
+    return first.strip('/') + '/' + second.strip('/')
+
 
 def _get_pysvn_url(url):
     """ only characters in path should be escaped, not in e.g. scheme """
-
-    if version_info.major == 2:
-        parsed_url=urlparse.urlparse(url.encode("utf8"))
-        escaped_path=urllib.quote(parsed_url.path)
-
-    if version_info.major == 3:
-        parsed_url=urllib.parse.urlparse(url) # in python3 strings are always unicode - encode is not needed
-        escaped_path=urllib.parse.quote(parsed_url.path)
-
+    parsed_url=urllib.parse.urlparse(url)
     resulting_url_parts=list(parsed_url)
-    resulting_url_parts[2]=escaped_path # 2 is index of path - see docs
-
-    if version_info.major == 2:
-        resulting_url=urlparse.urlunparse(resulting_url_parts).decode("utf8")
-
-    if version_info.major == 3:
-        resulting_url=urllib.parse.urlunparse(resulting_url_parts) # in python3 strings are unicode always, no need to decode
-    return resulting_url
-    
+    resulting_url_parts[2]=_quote(parsed_url.path) # 2 is index of path - see docs
+    return urllib.parse.urlunparse(resulting_url_parts)
@@ -1,13 +1,22 @@
+from functools import lru_cache
 from fs.info import Info
 
 # shortcuts for basic Info objects used in cdt fs implementations
 
-basic_path_info = lambda name, is_dir: Info({ 
-    "basic": {
-        "name": name,
-        "is_dir": is_dir
-    }
-})
+def basic_path_info(name, is_dir):
+    return Info({ 
+        "basic": {
+            "name": name,
+            "is_dir": is_dir
+        }
+    })
 
-dir_info = lambda name: basic_path_info(name, True)
-file_info = lambda name: basic_path_info(name, False)
+# called per entry in listings where names often repeat, so Info objects are shared.
+# Info is not modified by fs implementations, so sharing is safe
+@lru_cache(maxsize=4096)
+def dir_info(name):
+    return Info({"basic": {"name": name, "is_dir": True}})
+
+@lru_cache(maxsize=4096)
+def file_info(name):
+    return Info({"basic": {"name": name, "is_dir": False}})
@@ -1,14 +1,24 @@
-from __future__ import unicode_literals
-from sys import version_info
 import os
 from fs.tempfs import TempFS
 import tarfile
 import pysvn
-import urllib
+import urllib.parse
 from pkg_resources import Requirement, resource_filename
 
 # path is resolved accordingly to installed package's path
 _empty_repo_path=resource_filename("oc_pyfs.stubs", "empty_svn_repo.tar.gz")
+# RAM-backed location for repositories, so SVN commits don't wait for disk sync
+_shm_path="/dev/shm"
+
+
+def _get_temp_dir():
+    """ Returns parent directory for temporary repositories: OC_PYFS_TEMP_DIR if set, else /dev/shm if writable, else system default (None) """
+    temp_dir=os.environ.get("OC_PYFS_TEMP_DIR")
+    if temp_dir:
+        return temp_dir
+    if os.path.isdir(_shm_path) and os.access(_shm_path, os.W_OK):
+        return _shm_path
+    return None
 
 
 class TempRepo(object):
@@ -16,10 +26,11 @@ class TempRepo(object):
     Intended to be used as context manager so repository is destroyed after usage. 
     Repository is initialized from archive at _empty_repo_path.
     No trunk/branches/etc. structure is prepared - just empty directory.
+    Repository is placed to OC_PYFS_TEMP_DIR (or to tmpfs at /dev/shm when available).
     """
 
     def __enter__(self):
-        self._temp_fs=TempFS()
+        self._temp_fs=TempFS(temp_dir=_get_temp_dir())
         self._svn_client=pysvn.Client()
         with tarfile.open(_empty_repo_path, "r:gz") as repo_archive:
             repo_archive.extractall(self._temp_fs.getsyspath('/'))
@@ -58,35 +69,34 @@ class TempRepo(object):
         :param path: path to new file inside repository 
         :param content: optional file content 
         """
-        full_url=self.get_path_url(path)
         with TempFS() as creation_fs:
-            creation_dir=creation_fs.getsyspath('/').rstrip('/')
             creation_fs.writetext("foo", content)
-            target_url="file://"
-
-            if version_info.major == 2:
-                prepared_url_wo_scheme=urllib.quote(full_url.replace("file://", "").encode("utf8"))
-                target_url=target_url.encode("utf8")+prepared_url_wo_scheme
-                source_path=os.path.join(creation_dir, "foo")#.encode("utf8")
-                self._svn_client.import_(source_path, target_url,
-                                     log_message="test addition".encode("utf8"))
-
-            if version_info.major ==3:
-                prepared_url_wo_scheme=urllib.parse.quote(full_url.replace("file://", ""))
-                target_url=target_url+prepared_url_wo_scheme
-                # in python3 strings are always unicode, so encoding is not necessary
-                source_path=os.path.join(creation_dir, "foo")#.encode("utf8")
-                self._svn_client.import_(source_path, target_url,
-                                     log_message="test addition")
+            self._import(creation_fs.getsyspath("foo"), path)
 
-    
     def add_subtree(self, dir_path, file_pathes):
-        """ Shortcut for preparing directory structure for case whe files content doesn't matter. 
+        """ Shortcut for preparing directory structure for case whe files content doesn't matter.
+        Whole structure is added by single commit.
 
         :param dir_path: path to new directory
         :param file_pathes: list of files to be created inside new directory. Default value for add_file is written into them.
         """
-        self.add_dir(dir_path)
-        for file_path in file_pathes:
-            full_file_path="/".join([dir_path, file_path])
-            self.add_file(full_file_path)
+        if not file_pathes:
+            self.add_dir(dir_path)
+            return
+        with TempFS() as creation_fs:
+            for file_path in file_pathes:
+                creation_fs.makedirs(os.path.dirname(file_path), recreate=True)
+                creation_fs.writetext(file_path, "bar")
+            self._import(creation_fs.getsyspath('/').rstrip('/'), dir_path)
+
+    def _import(self, source_path, path):
+        """ Imports local file or directory to repository. Missing parent directories are created.
+
+        :param source_path: local path to import
+        :param path: target path inside repository
+        """
+        full_url=self.get_path_url(path)
+        prepared_url_wo_scheme=urllib.parse.quote(full_url.replace("file://", ""))
+        target_url="file://"+prepared_url_wo_scheme
+        self._svn_client.import_(source_path, target_url,
+                                 log_message="test addition")
@@ -0,0 +1,16 @@
+from fs.memoryfs import MemoryFS
+from fs.mountfs import MountFS
+
+
+def make_mountfs(tested_fs, mount_name):
+    """ Mounts given fs next to fresh MemoryFS mounted as "mem"
+
+    :param tested_fs: fs to mount
+    :param mount_name: mount point of tested_fs
+    :returns: tuple of MountFS and MemoryFS
+    """
+    mem_fs = MemoryFS()
+    root = MountFS()
+    root.mount(mount_name, tested_fs)
+    root.mount("mem", mem_fs)
+    return root, mem_fs
@@ -1,18 +1,30 @@
-from __future__ import unicode_literals
+import requests
+import threading
 from unittest import TestCase
-from oc_cdtapi.NexusAPI import NexusAPIError
+from unittest.mock import ANY, Mock, patch
+from concurrent.futures import ThreadPoolExecutor
+from oc_cdtapi.NexusAPI import NexusAPI, NexusAPIError
 from fs.errors import ResourceNotFound, FileExpected, DirectoryExpected, Unsupported
 from fs.memoryfs import MemoryFS
-from fs.mountfs import MountFS
 from oc_pyfs.NexusFS import NexusFS
-from sys import version_info
+from oc_pyfs.tests.helpers import make_mountfs
+from requests.adapters import HTTPAdapter
 
+# mocks are created once; tests only check their last call
+_MOCK_404=Mock(spec=NexusAPI)
+_MOCK_404.cat.side_effect=NexusAPIError(code=404)
 
-class NexusFSTestSuite(TestCase):
-    if version_info.major == 3:
-        def assertItemsEqual(self, expected_seq, actual_seq, msg=None):
-            return self.assertCountEqual( actual_seq, expected_seq, msg=msg );
+_MOCK_INVALID_GAV=Mock(spec=NexusAPI)
+_MOCK_INVALID_GAV.cat.side_effect=ValueError("g,a,v are mandatory")
+
+_MOCK_LS=Mock(spec=NexusAPI)
+_MOCK_LS.ls.return_value=["a", "b", "c"]
+
+_MOCK_EXISTS=Mock(spec=NexusAPI)
+_MOCK_EXISTS.exists.return_value=True
 
+
+class NexusFSTestSuite(TestCase):
     def _get_nexus_fs(self, *fs_args, **fs_kwargs):
         return NexusFS(*fs_args, **fs_kwargs)
 
@@ -28,66 +40,201 @@ class NexusFSTestSuite(TestCase):
         self.assertEqual(1, len(listing))
         self.assertEqual("content", work_fs.readtext(listing[0]))
 
+    def test_open_preload_readonly(self):
+        work_fs=MemoryFS()
+        with self._get_nexus_fs(MockCatNexusAPI(), work_fs=work_fs).openbin("g:a:v:p") as artifact:
+            self.assertFalse(artifact.writable())
+            with self.assertRaises(IOError):
+                artifact.write(b"XXXXXXX")
+        self.assertEqual("content", work_fs.readtext(list(work_fs.walk.files())[0]))
+
+    def test_open_cached(self):
+        nexus_api=MockCatNexusAPI()
+        nexus_fs=self._get_nexus_fs(nexus_api, max_cache_bytes=1024)
+        for _ in range(2):
+            with nexus_fs.open("g:a:v:p") as artifact:
+                self.assertEqual("content", artifact.read())
+        self.assertEqual(1, nexus_api.cat_calls)
+
+    def test_open_preload_cached(self):
+        nexus_api=MockCatNexusAPI()
+        work_fs=MemoryFS()
+        nexus_fs=self._get_nexus_fs(nexus_api, work_fs=work_fs, max_cache_bytes=1024)
+        for _ in range(2):
+            with nexus_fs.open("g:a:v:p") as artifact:
+                self.assertEqual("content", artifact.read())
+        self.assertEqual(1, nexus_api.cat_calls)
+        self.assertEqual(1, len(list(work_fs.walk.files())))
+
+    def test_open_not_cached_by_default(self):
+        nexus_api=MockCatNexusAPI()
+        nexus_fs=self._get_nexus_fs(nexus_api)
+        for _ in range(2):
+            with nexus_fs.open("g:a:v:p") as artifact:
+                self.assertEqual("content", artifact.read())
+        self.assertEqual(2, nexus_api.cat_calls)
+
+    def test_open_empty_not_cached_by_default(self):
+        nexus_api=MockCatNexusAPI(content="")
+        nexus_fs=self._get_nexus_fs(nexus_api)
+        for _ in range(2):
+            with nexus_fs.open("g:a:v:p") as artifact:
+                self.assertEqual("", artifact.read())
+        self.assertEqual(2, nexus_api.cat_calls)
+
+    def test_open_spooled_not_cached(self):
+        nexus_api=MockCatNexusAPI()
+        nexus_fs=self._get_nexus_fs(nexus_api, max_cache_bytes=1024)
+        with patch("oc_pyfs.NexusFS._SPOOL_MAX_SIZE", 3):
+            for _ in range(2):
+                with nexus_fs.open("g:a:v:p") as artifact:
+                    self.assertEqual("content", artifact.read())
+        self.assertEqual(2, nexus_api.cat_calls)
+
+    def test_cached_content_not_modified(self):
+        nexus_fs=self._get_nexus_fs(MockCatNexusAPI(), max_cache_bytes=1024)
+        with nexus_fs.openbin("g:a:v:p") as artifact:
+            artifact.write(b"XXXXXXX")
+        with nexus_fs.open("g:a:v:p") as artifact:
+            self.assertEqual("content", artifact.read())
+
+    def test_prefetch(self):
+        nexus_api=MockCatNexusAPI()
+        nexus_fs=self._get_nexus_fs(nexus_api, max_cache_bytes=1024)
+        nexus_fs.prefetch(["g:a:v:p", "g:a:v:p"])
+        with nexus_fs.open("g:a:v:p") as artifact:
+            self.assertEqual("content", artifact.read())
+        self.assertEqual(1, nexus_api.cat_calls)
+
+    def test_prefetch_cache_disabled(self):
+        nexus_api=MockCatNexusAPI()
+        with self.assertLogs("oc_pyfs.NexusFS", level="WARNING"):
+            self._get_nexus_fs(nexus_api).prefetch(["g:a:v:p"])
+        self.assertEqual(0, nexus_api.cat_calls)
+
+    def test_openbin_many(self):
+        nexus_api=MockCatNexusAPI()
+        opened=list(self._get_nexus_fs(nexus_api).openbin_many(["g:a:v:p"]))
+        self.assertEqual(1, len(opened))
+        self.assertEqual("g:a:v:p", opened[0][0])
+        self.assertEqual(b"content", opened[0][1].read())
+
+    def test_openbin_many_closed_early(self):
+        nexus_api=SlowCatNexusAPI()
+        with patch("oc_pyfs.NexusFS.ThreadPoolExecutor", RecordingExecutor):
+            opened=self._get_nexus_fs(nexus_api).openbin_many(["fast", "slow1", "slow2"], max_workers=1)
+            self.assertEqual("fast", next(opened)[0])
+            nexus_api.started.wait(10)
+            opened.close()
+        executor=RecordingExecutor.instances.pop()
+        _, slow1, slow2=executor.futures
+        # slow1 is blocked until release, so close() returned without waiting for it
+        self.assertFalse(nexus_api.release.is_set())
+        self.assertFalse(slow1.done())
+        self.assertTrue(slow2.cancelled())
+        nexus_api.release.set()
+        executor.shutdown(wait=True)
+        self.assertTrue(slow1.result()[0].closed)
+
+    def test_openbin_many_failure(self):
+        nexus_api=SlowCatNexusAPI()
+        nexus_api.release.set()
+        with self.assertRaises(ResourceNotFound):
+            list(self._get_nexus_fs(nexus_api).openbin_many(["fast", "missing"]))
+
+    def test_session_pool_enlarged(self):
+        nexus_api=MockCatNexusAPI()
+        nexus_api.web=requests.Session()
+        self._get_nexus_fs(nexus_api)
+        self.assertEqual(64, nexus_api.web.get_adapter("https://").poolmanager.connection_pool_kw["maxsize"])
+
+    def test_session_custom_adapter_kept(self):
+        nexus_api=MockCatNexusAPI()
+        nexus_api.web=requests.Session()
+        custom_adapter=CustomAdapter()
+        nexus_api.web.mount("https://", custom_adapter)
+        del nexus_api.web.headers["Accept-Encoding"]
+        self._get_nexus_fs(nexus_api)
+        self.assertIs(custom_adapter, nexus_api.web.get_adapter("https://"))
+        self.assertNotIn("Accept-Encoding", nexus_api.web.headers)
+
     def test_nonexistent_artifact_open_failure(self):
-        class MockNexusAPI(object):
-            def cat(_self, gav, *args, **kwargs):
-                self.assertEqual("g:a:v:p", gav)
-                raise NexusAPIError(code=404)
         with self.assertRaises(ResourceNotFound):
-            self._get_nexus_fs(MockNexusAPI()).open("g:a:v:p")
+            self._get_nexus_fs(_MOCK_404).open("g:a:v:p")
+        _MOCK_404.cat.assert_called_with("g:a:v:p", stream=True, write_to=ANY)
 
     def test_invalid_gav_open_failure(self):
-        class MockNexusAPI(object):
-            def cat(_self, gav, *args, **kwargs):
-                self.assertEqual("g:a:v:p", gav)
-                raise ValueError("g,a,v are mandatory")
         with self.assertRaises(FileExpected):
-            self._get_nexus_fs(MockNexusAPI()).open("g:a:v:p")
+            self._get_nexus_fs(_MOCK_INVALID_GAV).open("g:a:v:p")
+        _MOCK_INVALID_GAV.cat.assert_called_with("g:a:v:p", stream=True, write_to=ANY)
 
     def test_copy_inside_multifs(self):
-        nexus_fs= NexusFS(MockCatNexusAPI())
-        mem = MemoryFS()
-        root = MountFS()
-        root.mount("nexus", nexus_fs)
-        root.mount("mem", mem)
-        root.copy(u"/nexus/g:a:v:p", u"/mem/temp.txt")
-        with mem.open(u"temp.txt") as copied:
-            self.assertIn(u"content", copied.read())
+        root, mem = make_mountfs(NexusFS(MockCatNexusAPI()), "nexus")
+        root.copy("/nexus/g:a:v:p", "/mem/temp.txt")
+        with mem.open("temp.txt") as copied:
+            self.assertIn("content", copied.read())
 
     def test_list_root(self):
-        class MockNexusAPI(object):
-            def ls(_self, wildcard, *args, **kwargs):
-                self.assertEqual("com*::", wildcard)
-                return ["a", "b", "c"]
-        listing=self._get_nexus_fs(MockNexusAPI()).listdir("/")
-        self.assertItemsEqual(["a", "b", "c"], listing)
+        listing=self._get_nexus_fs(_MOCK_LS).listdir("/")
+        self.assertCountEqual(["a", "b", "c"], listing)
+        _MOCK_LS.ls.assert_called_with("com*::")
 
     def test_list_dir_forbidden(self):
         with self.assertRaises(Unsupported):
             listing=self._get_nexus_fs(None).listdir("foo")
 
     def test_exists(self):
-        class MockNexusAPI(object):
-            def exists(_self, gav, *args, **kwargs):
-                self.assertEqual("g:a:v:p", gav)
-                return True
-        nexus_fs=self._get_nexus_fs(MockNexusAPI())
+        nexus_fs=self._get_nexus_fs(_MOCK_EXISTS)
         self.assertTrue(nexus_fs.exists("g:a:v:p"))
+        _MOCK_EXISTS.exists.assert_called_with("g:a:v:p")
 
     def test_getinfo_unavailable(self):
-        class MockNexusAPI(object):
-            def exists(_self, gav, *args, **kwargs):
-                self.assertEqual("g:a:v:p", gav)
-                return True
         with self.assertRaises(Unsupported):
-            self._get_nexus_fs(MockNexusAPI()).getinfo("g:a:v:p")
+            self._get_nexus_fs(_MOCK_EXISTS).getinfo("g:a:v:p")
 
 
 class MockCatNexusAPI(object):
-    def cat(self_, gav, write_to=None, *args, **kwargs):
+    def __init__(self_, content="content"):
+        self_.cat_calls=0
+        self_.content=content
+
+    def cat(self_, gav, write_to, *args, **kwargs):
+        """ NexusFS always streams artifacts, so content is only written to write_to like real NexusAPI does """
         assert "g:a:v:p" == gav
-        data="content".encode("utf-8")
-        if write_to:
-            write_to.write(data)
-        else:
-            return data
+        self_.cat_calls+=1
+        write_to.write(self_.content.encode("utf-8"))
+
+
+class SlowCatNexusAPI(object):
+    """ Downloads of "slow*" gavs wait for release event, "missing" gav doesn't exist """
+    def __init__(self_):
+        self_.started=threading.Event()
+        self_.release=threading.Event()
+
+    def cat(self_, gav, write_to, *args, **kwargs):
+        if gav == "missing":
+            raise NexusAPIError(code=404)
+        if gav.startswith("slow"):
+            self_.started.set()
+            # timeout only keeps suite from hanging if close() blocks; no assertion depends on it
+            self_.release.wait(10)
+        write_to.write("content".encode("utf-8"))
+
+
+class RecordingExecutor(ThreadPoolExecutor):
+    """ Remembers created executors and their futures, so tests can check download states """
+    instances=[]
+
+    def __init__(self_, *args, **kwargs):
+        super(RecordingExecutor, self_).__init__(*args, **kwargs)
+        self_.futures=[]
+        RecordingExecutor.instances.append(self_)
+
+    def submit(self_, *args, **kwargs):
+        future=super(RecordingExecutor, self_).submit(*args, **kwargs)
+        self_.futures.append(future)
+        return future
+
+
+class CustomAdapter(HTTPAdapter):
+    pass
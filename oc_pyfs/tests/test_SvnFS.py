@@ -1,68 +1,103 @@
-# -*- coding: utf-8-*-
-from __future__ import unicode_literals
 from unittest import TestCase
 import pysvn
 from fs.errors import ResourceNotFound, FileExpected, DirectoryExpected, Unsupported
-from fs.memoryfs import MemoryFS
-from fs.mountfs import MountFS
 import logging
-from contextlib import contextmanager
+from functools import wraps
+from uuid import uuid4
 from oc_pyfs.SvnFS import SvnFS, SvnReadonlyFS
 from oc_pyfs.fs_utils import dir_info, file_info
 from oc_pyfs.stubs.temp_svn_repo import TempRepo
-from sys import version_info
+from oc_pyfs.tests.helpers import make_mountfs
+from urllib.parse import urljoin
 
-if version_info.major == 3:
-    import urllib.parse as urlparse;
-else:
-    import urlparse;
+_CYR_PATH = "doc/design/Межцентровой обмен_NEW.pdf"
+_CYR_CONTENT = "Кириллица"
 
 
-logging.basicConfig()
+def _added(path):
+    """ Expected changed_paths entry for plain addition """
+    return {"path": path, "action": "A", "copyfrom_path": None, "copyfrom_revision": None}
 
 
-@contextmanager
-def _suppress_expected_error(filter_fragment):
-    class ExpectedLogSuppressor(object):
+# changed_paths of revisions created by log tests, relative to repository root
+_EXPECTED_REV3 = (_added("foo"),)
+_EXPECTED_REV4 = (_added("bar/baz"), _added("bar"))
+_EXPECTED_REV5 = (_added("bar/baz2"),)
+# same revisions relative to "bar" directory
+_EXPECTED_BAR_REV4 = (_added("baz"), _added(""))
+_EXPECTED_BAR_REV5 = (_added("baz2"),)
 
-        def __init__(self):
-            self.logged_records=[]
-        
-        def filter(self, record):
-            self.logged_records.append(record)
-            should_skip=(filter_fragment in record.msg)
-            return 0 if should_skip else 1
 
-    suppressor=ExpectedLogSuppressor()
-    module_logger=logging.getLogger("oc_pyfs.SvnFS")
-    module_logger.addFilter(suppressor)
-    yield suppressor
-    module_logger.removeFilter(suppressor)
+class _RepoDir(object):
+    """ Exposes TempRepo helpers for a directory inside repository, so that tests may share one repository """
+
+    def __init__(self, temp_repo, dir_path):
+        self.temp_repo=temp_repo
+        self._dir_path=dir_path
+        temp_repo.add_dir(dir_path)
+
+    @property
+    def url(self):
+        return self.get_path_url("/")
+
+    def get_path_url(self, path):
+        return self.temp_repo.get_path_url(self._subpath(path))
+
+    def add_dir(self, path):
+        self.temp_repo.add_dir(self._subpath(path))
+
+    def add_file(self, path, content="bar"):
+        self.temp_repo.add_file(self._subpath(path), content)
+
+    def add_subtree(self, dir_path, file_pathes):
+        self.temp_repo.add_subtree(self._subpath(dir_path), file_pathes)
 
+    def _subpath(self, path):
+        return self._dir_path + "/" + path.strip("/")
 
-def _in_test_repo(test_case):    
+
+def _in_test_repo(test_case):
+    """ Runs test in its own directory of repository shared by test class """
+    @wraps(test_case)
+    def wrapped(suite, *args, **kwargs):
+        dir_path="%s_%s" % (test_case.__name__, uuid4().hex)
+        suite.repo=_RepoDir(suite.shared_repo, dir_path)
+        test_case(suite, *args, **kwargs)
+    return wrapped
+
+
+def _in_own_test_repo(test_case):
+    """ Runs test in new repository. Needed when test depends on revision numbers or whole repository log """
+    @wraps(test_case)
     def wrapped(suite, *args, **kwargs):
         with TempRepo() as repo:
             suite.repo=repo
             test_case(suite, *args, **kwargs)
     return wrapped
-    
 
-class FsApiTestSuite(TestCase):
-    if version_info.major == 3:
-        def assertItemsEqual(self, expected_seq, actual_seq, msg=None):
-            return self.assertCountEqual( actual_seq, expected_seq, msg=msg );
 
+class _SharedRepoTestCase(TestCase):
+    """ Creates one repository and one pysvn client per test class since their creation is the slowest part of tests """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.shared_repo=TempRepo().__enter__()
+        # registered right away, so repository is removed even if the rest of setUpClass fails
+        cls.addClassCleanup(cls.shared_repo.__exit__, None, None, None)
+        cls.svn_client=pysvn.Client()
+
+
+class FsApiTestSuite(_SharedRepoTestCase):
     def _get_svn_fs(self):
-        return SvnFS(self.repo.url, pysvn.Client())
+        return SvnFS(self.repo.url, self.svn_client)
 
     def _get_svn_fs_ro( self ):
-        return SvnReadonlyFS( self.repo.url, pysvn.Client() );
+        return SvnReadonlyFS( self.repo.url, self.svn_client );
 
     @_in_test_repo
     def test_failure_on_missing_url(self):
         with self.assertRaises(ResourceNotFound):
-            SvnFS( urlparse.urljoin( self.repo.url,"foo/bar" ), pysvn.Client())
+            SvnFS(self.repo.get_path_url("foo/bar"), self.svn_client)
 
     @_in_test_repo
     def test_unknown_error_processed(self):
@@ -71,18 +106,18 @@ class FsApiTestSuite(TestCase):
                 err=pysvn.ClientError()
                 err.args=("error message", (("error", 123), ("message", 456)))
                 raise err
-        with self.assertRaises(Unsupported), _suppress_expected_error("Unhandled") as log_suppressor:
-            svn_fs=SvnFS(self.repo.url, FailingClient())
-        log_records=log_suppressor.logged_records
-        self.assertEqual(1, len(log_records))
-        self.assertEqual(logging.ERROR, log_records[0].levelno)
+        with self.assertRaises(Unsupported), self.assertLogs("oc_pyfs.SvnFS", level="ERROR") as logs:
+            SvnFS(self.repo.url, FailingClient())
+        self.assertEqual(1, len(logs.records))
+        self.assertEqual(logging.ERROR, logs.records[0].levelno)
+        self.assertIn("Unhandled", logs.records[0].msg)
 
     @_in_test_repo
     def test_listdir(self):
         self.repo.add_dir("a")
         self.repo.add_file("b")
         ls = self._get_svn_fs().listdir('/')
-        self.assertItemsEqual(["a", "b"], ls)
+        self.assertCountEqual(["a", "b"], ls)
         
     @_in_test_repo
     def test_listdir_expects_dir(self):
@@ -99,13 +134,8 @@ class FsApiTestSuite(TestCase):
     def test_listdir_same_prefix_bug(self):
         self.repo.add_subtree("foo", ["foo_bar", "foo_baz", "bar", "baz"])
         with self._get_svn_fs() as svn_fs:
-
-            if version_info.major == 2:
-                ls_result = svn_fs.listdir(u"foo")
-            if version_info.major == 3:
-                ls_result = svn_fs.listdir("foo")
-
-            self.assertItemsEqual(["foo_bar", "foo_baz", "bar", "baz"],
+            ls_result = svn_fs.listdir("foo")
+            self.assertCountEqual(["foo_bar", "foo_baz", "bar", "baz"],
                                   ls_result)
 
     @_in_test_repo
@@ -128,100 +158,57 @@ class FsApiTestSuite(TestCase):
 
     @_in_test_repo
     def test_open_file_with_cyrillic_path(self):
-        path = "doc/design/Межцентровой обмен_NEW.pdf";
-
-        if version_info.major == 2:
-            path = unicode( path );
-
-        self.repo.add_file(path)
-        with self._get_svn_fs().open(path) as svn_file:
+        self.repo.add_file(_CYR_PATH)
+        with self._get_svn_fs().open(_CYR_PATH) as svn_file:
             self.assertEqual("bar", svn_file.read())
 
     @_in_test_repo
     def test_open_file_with_cyrillic_content(self):
-        test_fn = "Кириллица";
-        
-        if version_info.major == 2:
-            test_fn = unicode( test_fn );
-
-        self.repo.add_file("foo", test_fn)
+        self.repo.add_file("foo", _CYR_CONTENT)
         with self._get_svn_fs().open("foo") as svn_file:
-            self.assertEqual(test_fn, svn_file.read())
+            self.assertEqual(_CYR_CONTENT, svn_file.read())
 
     @_in_test_repo
-    def test_getinfo_file(self):
+    def test_getinfo_variants(self):
         self.repo.add_file("foo/bar")
-        info = self._get_svn_fs().getinfo("foo/bar")
+        self.repo.add_dir("baz/bar")
+        svn_fs=self._get_svn_fs()
         # getinfo returns basename!
-        self.assertEqual("bar", info.get("basic", "name"))
-        self.assertEqual(False, info.get("basic", "is_dir"))
-
-    @_in_test_repo
-    def test_getinfo_from_root(self):
-        self.repo.add_file("foo/bar")
-        info = self._get_svn_fs().getinfo("/foo/bar")
-        self.assertEqual("bar", info.get("basic", "name"))
-        self.assertEqual(False, info.get("basic", "is_dir"))
-
-    @_in_test_repo
-    def test_getinfo_dir(self):
-        self.repo.add_dir("foo/bar")
-        info = self._get_svn_fs().getinfo("foo/bar")
-        self.assertEqual("bar", info.get("basic", "name"))
-        self.assertEqual(True, info.get("basic", "is_dir"))
-
-    @_in_test_repo
-    def test_getinfo_fails_on_nonexistent_file(self):
-        with self.assertRaises(ResourceNotFound):
-            self._get_svn_fs().getinfo("foo")
+        for path, is_dir in [("foo/bar", False), ("/foo/bar", False), ("baz/bar", True)]:
+            with self.subTest(path=path):
+                info = svn_fs.getinfo(path)
+                self.assertEqual("bar", info.get("basic", "name"))
+                self.assertEqual(is_dir, info.get("basic", "is_dir"))
+        with self.subTest(path="qux"):
+            with self.assertRaises(ResourceNotFound):
+                svn_fs.getinfo("qux")
 
     @_in_test_repo
     def test_copy_inside_multifs(self):
         self.repo.add_file("foo/bar")
-        svn_fs=self._get_svn_fs()
-        mem_fs = MemoryFS()
-        root = MountFS()
-        root.mount("svn", svn_fs)
-        root.mount("mem", mem_fs)
-
-        if version_info.major == 3:
-            root.copy("/svn/foo/bar", "/mem/baz")
-            with mem_fs.open("baz") as copied:
-                self.assertEqual("bar", copied.read())
-
-        if version_info.major == 2:
-            root.copy(u"/svn/foo/bar", u"/mem/baz")
-            with mem_fs.open(u"baz") as copied:
-                self.assertEqual(u"bar", copied.read())
+        root, mem_fs = make_mountfs(self._get_svn_fs(), "svn")
+        root.copy("/svn/foo/bar", "/mem/baz")
+        with mem_fs.open("baz") as copied:
+            self.assertEqual("bar", copied.read())
 
     @_in_test_repo
     def test_opendir(self):
         self.repo.add_file("foo/bar")
         top_dir = self._get_svn_fs()
         sub_dir = top_dir.opendir("foo")
-
-        if version_info.major == 3: self.assertEqual(["bar"], sub_dir.listdir('/'))
-        if version_info.major == 2: self.assertEqual(["bar"], sub_dir.listdir(u'/'))
+        self.assertEqual(["bar"], sub_dir.listdir('/'))
 
     @_in_test_repo
     def test_copydir_inside_multifs(self):
         self.repo.add_file("foo/bar")
         svn_fs=self._get_svn_fs()
         info = svn_fs.getinfo("/foo/bar");
-        root = MountFS()
-        root.mount("svn", svn_fs)
-        mem_fs = MemoryFS()
-        root.mount("mem", mem_fs)
-
-        if version_info.major == 3:
-            root.copydir("/svn/foo", "/mem/baz", create=True)
-        if version_info.major == 2:
-            root.copydir(u"/svn/foo", u"/mem/baz", create=True)
-
+        root, mem_fs = make_mountfs(svn_fs, "svn")
+        root.copydir("/svn/foo", "/mem/baz", create=True)
         self.assertEqual(["baz"], mem_fs.listdir('/'))
         self.assertEqual(["bar"], mem_fs.listdir("baz"))
 
-    @_in_test_repo
+    @_in_own_test_repo
     def test_path_log_retrieved(self):
         svn_fs=self._get_svn_fs()
         self.repo.add_file("foo") # rev 3
@@ -229,16 +216,12 @@ class FsApiTestSuite(TestCase):
         self.repo.add_file("bar/baz2") # rev 5
         log_entries=svn_fs.getinfo("bar", namespaces=["log"]).get("log", "change_history")
         self.assertEqual(2, len(log_entries))
-        self.assertItemsEqual([{"path": "baz2", "action": "A", "copyfrom_path": None,
-                                "copyfrom_revision": None} ], log_entries[0]["changed_paths"])
+        self.assertCountEqual(_EXPECTED_BAR_REV5, log_entries[0]["changed_paths"])
         self.assertEqual(5, log_entries[0]["revision"].number)
-        self.assertItemsEqual([{"path": "baz", "action": "A", "copyfrom_path": None,
-                                "copyfrom_revision": None},
-                               {"path": "", "action": "A", "copyfrom_path": None,
-                                "copyfrom_revision": None}], log_entries[1]["changed_paths"])
+        self.assertCountEqual(_EXPECTED_BAR_REV4, log_entries[1]["changed_paths"])
         self.assertEqual(4, log_entries[1]["revision"].number)
 
-    @_in_test_repo
+    @_in_own_test_repo
     def test_initial_url_log_retrieved(self):
         svn_fs=self._get_svn_fs()
         self.repo.add_file("foo") # rev 3
@@ -246,19 +229,14 @@ class FsApiTestSuite(TestCase):
         self.repo.add_file("bar/baz2") # rev 5
         log_entries=svn_fs.getinfo('/', namespaces=["log"]).get("log", "change_history")
         self.assertEqual(5, len(log_entries)) # including 2 initial revisions
-        self.assertItemsEqual([{"path": "bar/baz2", "action": "A", "copyfrom_path": None,
-                                "copyfrom_revision": None} ], log_entries[0]["changed_paths"])
+        self.assertCountEqual(_EXPECTED_REV5, log_entries[0]["changed_paths"])
         self.assertEqual(5, log_entries[0]["revision"].number)
-        self.assertItemsEqual([{"path": "bar/baz", "action": "A", "copyfrom_path": None,
-                                "copyfrom_revision": None},
-                               {"path": "bar", "action": "A", "copyfrom_path": None,
-                                "copyfrom_revision": None}], log_entries[1]["changed_paths"])
+        self.assertCountEqual(_EXPECTED_REV4, log_entries[1]["changed_paths"])
         self.assertEqual(4, log_entries[1]["revision"].number)
-        self.assertItemsEqual([{"path": "foo", "action": "A", "copyfrom_path": None,
-                                "copyfrom_revision": None} ], log_entries[2]["changed_paths"])
-        self.assertEqual(3, log_entries[2]["revision"].number)        
+        self.assertCountEqual(_EXPECTED_REV3, log_entries[2]["changed_paths"])
+        self.assertEqual(3, log_entries[2]["revision"].number)
 
-    @_in_test_repo
+    @_in_own_test_repo
     def test_initial_url_log_limited(self):
         svn_fs=self._get_svn_fs()
         self.repo.add_file("foo") # rev 3
@@ -266,21 +244,17 @@ class FsApiTestSuite(TestCase):
         self.repo.add_file("bar/baz2") # rev 5
         log_entries=svn_fs.getinfo('/', namespaces=["log_2"]).get("log_2", "change_history")
         self.assertEqual(2, len(log_entries))
-        self.assertItemsEqual([{"path": "bar/baz2", "action": "A", "copyfrom_path": None,
-                                "copyfrom_revision": None} ], log_entries[0]["changed_paths"])
+        self.assertCountEqual(_EXPECTED_REV5, log_entries[0]["changed_paths"])
         self.assertEqual(5, log_entries[0]["revision"].number)
-        self.assertItemsEqual([{"path": "bar/baz", "action": "A", "copyfrom_path": None,
-                                "copyfrom_revision": None},
-                               {"path": "bar", "action": "A", "copyfrom_path": None,
-                                "copyfrom_revision": None}], log_entries[1]["changed_paths"])
+        self.assertCountEqual(_EXPECTED_REV4, log_entries[1]["changed_paths"])
         self.assertEqual(4, log_entries[1]["revision"].number)
 
-    @_in_test_repo
+    @_in_own_test_repo
     def test_bug_creation_commit_filtered(self):
         svn_fs=self._get_svn_fs()
         log_entries=svn_fs.getinfo('/', namespaces=["log"]).get("log", "change_history")
         creation_pathes=[change["path"] for change in log_entries[-1]["changed_paths"]]
-        self.assertItemsEqual(["trunk"], creation_pathes)
+        self.assertCountEqual(["trunk"], creation_pathes)
         
     @_in_test_repo
     def test_path_url_composed(self):
@@ -294,7 +268,7 @@ class FsApiTestSuite(TestCase):
         syspath=svn_fs.getsyspath('/')
         self.assertEqual(self.repo.url, syspath)
 
-    @_in_test_repo
+    @_in_own_test_repo
     def test_revision_retrieved(self):
         svn_fs = self._get_svn_fs()
         info=svn_fs.getinfo('/', namespaces=["svn"])
@@ -305,23 +279,15 @@ class FsApiTestSuite(TestCase):
     @_in_test_repo
     def test_get_root_path_url( self ):
         svn_fs = self._get_svn_fs_ro();
-        self.assertEqual( urlparse.urljoin( self.repo.url, 'buller/stroke' ), svn_fs.get_root_path_url( 'buller/stroke' ) );
+        # url is relative to repository root, not to directory of test
+        self.assertEqual( urljoin( self.repo.temp_repo.url, 'buller/stroke' ), svn_fs.get_root_path_url( 'buller/stroke' ) );
 
         #testing unicode paths
+        self.assertEqual( urljoin( self.repo.temp_repo.url, 'Isäni/Молодец' ), svn_fs.get_root_path_url( 'Isäni/Молодец' ) );
 
-        if version_info == 2:
-            self.assertEqual( urlparse.urljoin( self.repo.url, u'Isäni/Молодец' ), svn_fs.get_root_path_url( u'Isäni/Молодец' ) );
-            self.assertEqual( urlparse.urljoin( self.repo.url, u'Isäni/Молодец' ), svn_fs.get_root_path_url( unicode( 'Isäni/Молодец' ).encode( 'utf8' ) ) );
-
-        if version_info == 3:
-            self.assertEqual( urlparse.urljoin( self.repo.url, 'Isäni/Молодец' ), svn_fs.get_root_path_url( 'Isäni/'.encode( 'utf8' ) ) );
-
-class SvnWalkTestSuite(TestCase):        
-    if version_info.major == 3:
-        def assertItemsEqual(self, expected_seq, actual_seq, msg=None):
-            return self.assertCountEqual( actual_seq, expected_seq, msg=msg );
+class SvnWalkTestSuite(_SharedRepoTestCase):
     def _get_svn_fs(self):
-        return SvnFS(self.repo.url, pysvn.Client())
+        return SvnFS(self.repo.url, self.svn_client)
 
     @_in_test_repo
     def test_walk(self):
@@ -347,16 +313,37 @@ class SvnWalkTestSuite(TestCase):
     def test_files_walked(self):
         self.repo.add_subtree("foo", ["bar1", "bar2"])
         self.repo.add_subtree("foo2", ["bar1", "bar2"])
-        walk_result=list(self._get_svn_fs().walk.files())
-        self.assertItemsEqual(["/foo/bar1", "/foo/bar2", "/foo2/bar1", "/foo2/bar2"],
-                              walk_result)
+        self.assertEqual({"/foo/bar1", "/foo/bar2", "/foo2/bar1", "/foo2/bar2"},
+                         set(self._get_svn_fs().walk.files()))
 
     @_in_test_repo
     def test_dirs_walked(self):
         self.repo.add_subtree("foo", ["bar1", "bar2"])
         self.repo.add_subtree("foo2", ["bar1", "bar2"])
-        walk_result=list(self._get_svn_fs().walk.dirs())
-        self.assertItemsEqual(["/foo", "/foo2"], walk_result)
+        self.assertEqual({"/foo", "/foo2"}, set(self._get_svn_fs().walk.dirs()))
+
+    @_in_test_repo
+    def test_filtered_files_walked(self):
+        self.repo.add_subtree("foo", ["bar1", "baz1"])
+        self.repo.add_subtree("foo2", ["bar1", "bar2"])
+        self.assertEqual({"/foo/bar1", "/foo2/bar1", "/foo2/bar2"},
+                         set(self._get_svn_fs().walk.files(filter=["bar*"])))
+
+    @_in_test_repo
+    def test_filtered_walk(self):
+        self.repo.add_subtree("foo", ["bar1", "baz1"])
+        walk_result = list(self._get_svn_fs().walk(filter=["baz*"]))
+        self.assertEqual(2, len(walk_result))
+        self.assertEqual(('/', [dir_info("foo")], []), walk_result[0])
+        self.assertEqual(("/foo", [], [file_info("baz1")]), walk_result[1])
+
+    @_in_test_repo
+    def test_excluded_dirs_walked(self):
+        self.repo.add_subtree("foo", ["bar1", "bar2"])
+        self.repo.add_subtree("foo2/baz", ["bar1"])
+        self.repo.add_subtree("foo3", ["bar1"])
+        self.assertEqual({"/foo/bar1", "/foo/bar2"},
+                         set(self._get_svn_fs().walk.files(exclude_dirs=["foo2", "foo3"])))
 
     @_in_test_repo
     def test_info_walk(self):
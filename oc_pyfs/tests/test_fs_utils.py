@@ -29,3 +29,8 @@ class TestFsUtils( TestCase ):
                 "is_dir": True
             } } ) )
 
+
+    def test_info_shared( self ):
+        self.assertIs( dir_info( "baatvaa" ), dir_info( "baatvaa" ) )
+        self.assertIs( file_info( "lazhaa" ), file_info( "lazhaa" ) )
+        self.assertNotEqual( dir_info( "lazhaa" ), file_info( "lazhaa" ) )
@@ -11,12 +11,15 @@ spec = {
     "long_description_content_type": "text/plain",
     "packages": ["oc_pyfs"],
     "install_requires": [
-        "chardet >= 2.3.0",
         "fs",
-        "oc-cdtapi"
+        "oc-cdtapi",
+        "requests"
     ],
+    "extras_require": {
+        "test": ["pytest", "pytest-xdist"]
+    },
     "package_data": {},
-    "python_requires": ">=3.6",
+    "python_requires": ">=3.8",
 }
 
 setup(**spec)